@@ -6,6 +6,9 @@ from .simulation import EpidemicToleranceSimulation, ToleranceSimulation
 # import the classes to simulate the node remotion and the epidemic spreading
 from .plot_functions import make_plot, make_plot_2networks, make_plot_fragmentation
 # import useful functions to visualize the plots
+from .sparse_functions import graph_to_csr, accepts_csr
+# import the conversion of networks into sparse adjacency matrices and the
+# marker of the functions that can work on them
 
 
 __author__  = ['Mia Nascimben']
@@ -9,6 +9,16 @@ from .plot_functions import make_plot, make_plot_fragmentation, make_plot_2netwo
 
 from .constants import EPIDEMICS_FUNCS
 
+def n_jobs_type(value):
+    '''
+    Checks the number of processes given with '-n_jobs': -1 (all the CPU 
+    cores) or a positive integer.
+    '''
+    n_jobs = int(value)
+    if n_jobs != -1 and n_jobs < 1:
+        raise argparse.ArgumentTypeError(f"must be -1 or a positive integer, not {value}")
+    return n_jobs
+
 def parse_args():
     
     # global softwer information 
@@ -62,6 +72,8 @@ def parse_args():
                         help = "Number of simulations of the epidemic to run to average the epidemic features, default = 100")
     parser.add_argument('-num_points', type=int, default=15,
                         help = "Number of data to acquire, default = 15")
+    parser.add_argument('-n_jobs', type=n_jobs_type, default=1,
+                        help = "Number of processes running the error and attack simulations in parallel (-1 to use all the cores), default = 1")
     
     args = parser.parse_args()
     
@@ -98,6 +110,7 @@ def main():
     MAX_REMOVAL_RATE = args.max_rate
     NUM_POINTS = args.num_points
     NUM_SIMULATIONS = args.num_sim
+    N_JOBS = args.n_jobs
     
     # for reproducibility
     random.seed(SEED)
@@ -116,8 +129,8 @@ def main():
             
             if args.f == "connectivity":
                 
-                freq, d_error_ER, d_attack_ER = connectivity_analysis(Simulator_ER)
-                freq, d_error_SF, d_attack_SF = connectivity_analysis(Simulator_SF)
+                freq, d_error_ER, d_attack_ER = connectivity_analysis(Simulator_ER, SEED, N_JOBS)
+                freq, d_error_SF, d_attack_SF = connectivity_analysis(Simulator_SF, SEED, N_JOBS)
 
                 fig, ax = make_plot_2networks(freq, 
                                      d_error_ER, d_attack_ER, d_error_SF, d_attack_SF,  
@@ -127,8 +140,8 @@ def main():
                 
             elif args.f == "fragmentation":
                 
-                freq, S_error_ER, S_attack_ER, s_error_ER, s_attack_ER = fragmentation_analysis(Simulator_ER)
-                freq, S_error_SF, S_attack_SF, s_error_SF, s_attack_SF = fragmentation_analysis(Simulator_SF)
+                freq, S_error_ER, S_attack_ER, s_error_ER, s_attack_ER = fragmentation_analysis(Simulator_ER, SEED, N_JOBS)
+                freq, S_error_SF, S_attack_SF, s_error_SF, s_attack_SF = fragmentation_analysis(Simulator_SF, SEED, N_JOBS)
                 
                 # plot for the S and <s> for ER
                 fig, ax = make_plot_fragmentation(freq, 
@@ -148,8 +161,8 @@ def main():
             Simulator_SF = EpidemicToleranceSimulation(SF,  MU, NU, STEPS, INFECTED_T0, MAX_REMOVAL_RATE, NUM_POINTS)
             
             feature = EPIDEMICS_FUNCS[args.f][0]
-            freq, results_error_ER, results_attack_ER = epidemic_feature_analysis(Simulator_ER, feature, NUM_SIMULATIONS)
-            freq, results_error_SF, results_attack_SF = epidemic_feature_analysis(Simulator_SF, feature, NUM_SIMULATIONS)
+            freq, results_error_ER, results_attack_ER = epidemic_feature_analysis(Simulator_ER, feature, NUM_SIMULATIONS, SEED, N_JOBS)
+            freq, results_error_SF, results_attack_SF = epidemic_feature_analysis(Simulator_SF, feature, NUM_SIMULATIONS, SEED, N_JOBS)
 
             label = EPIDEMICS_FUNCS[args.f][1]
             fig, ax = make_plot_2networks(freq, 
@@ -173,7 +186,7 @@ def main():
             Simulator = ToleranceSimulation(G, MAX_REMOVAL_RATE)
                 
             if args.f == "connectivity":
-                freq, d_error, d_attack = connectivity_analysis(Simulator)
+                freq, d_error, d_attack = connectivity_analysis(Simulator, SEED, N_JOBS)
                 fig, ax = make_plot(freq, 
                                         d_error, d_attack,  
                                         ylabel='Diameter',
@@ -181,7 +194,7 @@ def main():
                                         )
                 
             elif args.f == "fragmentation":
-                freq, S_error, S_attack, s_error, s_attack = fragmentation_analysis(Simulator)
+                freq, S_error, S_attack, s_error, s_attack = fragmentation_analysis(Simulator, SEED, N_JOBS)
                     
                 fig, ax =make_plot_fragmentation(freq, 
                                                 S_error, S_attack, s_error, s_attack,  
@@ -195,7 +208,7 @@ def main():
             Simulator = EpidemicToleranceSimulation(G, MU, NU, STEPS, INFECTED_T0, MAX_REMOVAL_RATE, NUM_POINTS)
                 
             feature = EPIDEMICS_FUNCS[args.f][0]
-            freq, results_error, results_attack = epidemic_feature_analysis(Simulator, feature, NUM_SIMULATIONS)
+            freq, results_error, results_attack = epidemic_feature_analysis(Simulator, feature, NUM_SIMULATIONS, SEED, N_JOBS)
                 
             label = EPIDEMICS_FUNCS[args.f][1]
             fig, ax = make_plot(freq, 
@@ -19,13 +19,15 @@
 
 import networkx as nx
 import numpy as np
-import random as rn
-import pickle 
 import os
+from concurrent.futures import ProcessPoolExecutor
+from scipy import sparse
 from .remotion_functions import error, attack 
+from .sparse_functions import accepts_csr, graph_to_csr, component_sizes_csr, fast_diameter
 
 #-------------------------------GRAPH FEATURES---------------------------------
 
+@accepts_csr
 def diameter(G):
     '''
     Calculate the average shortest path length (also known as the diameter) 
@@ -33,8 +35,9 @@ def diameter(G):
 
     Parameters
     ----------
-    G : networkx.classes.graph.Graph
-        The input graph for which the diameter is calculated.
+    G : networkx.classes.graph.Graph or scipy.sparse.csr_array
+        The input graph for which the diameter is calculated, or its 
+        adjacency matrix (see 'graph_to_csr()').
 
     Returns
     -------
@@ -58,38 +61,17 @@ def diameter(G):
     of this function, it refers to the average shortest path length.
     The average shortest path length is a measure of the efficiency of 
     information flow in the graph, representing the average distance between 
-    all pairs of nodes.
+    all pairs of nodes. In not connected graphs the pairs of nodes without a
+    path between them are not counted.
     '''
-    # case not empty graph
-    if G.number_of_nodes() > 0:
+    # the breadth-first searches from every node run in compiled code on the
+    # CSR arrays, for connected and not connected graphs alike
+    if not sparse.issparse(G):
+        G = graph_to_csr(G)
         
-        # The cases of directed and undirected graphs need different definition
-        # of 'connected' and 'strongly connected'.
-        directed_strongly_connected = G.is_directed() and nx.is_strongly_connected(G)
-        undirected_connected = not G.is_directed() and nx.is_connected(G)
-        
-        if directed_strongly_connected or  undirected_connected: 
-            diameter = nx.average_shortest_path_length(G)  
-            
-        else:    
-            shortest_paths = nx.shortest_path_length(G)
-                
-            shortest_path_list = [
-                length for node, paths in shortest_paths
-                for length in paths.values() if length > 0
-                ]
-            # case of a graph without edges
-            if len(shortest_path_list) == 0: 
-                diameter = 0
-                    
-            else:
-                shortest_path_list = np.array(shortest_path_list, dtype=np.int32)
-                diameter = np.mean(shortest_path_list)
-                
-    else: #empty graph
-        diameter = 0
-    return diameter
+    return fast_diameter(G)
   
+@accepts_csr
 def largest_connected_component_size(G):
     '''
     Calculates the size of the largest connected component in the network. 
@@ -98,8 +80,8 @@ def largest_connected_component_size(G):
     
     Parameters
     ----------
-    G : networkx.classes.graph.Graph
-        The input graph.
+    G : networkx.classes.graph.Graph or scipy.sparse.csr_array
+        The input graph or its adjacency matrix (see 'graph_to_csr()').
 
     Returns
     -------
@@ -112,7 +94,7 @@ def largest_connected_component_size(G):
     >>> G = nx.path_graph(4)
     >>> nx.add_path(G, [10, 11, 12])
     >>> largest_connected_component_size(G)
-    4
+    0.5714285714285714
     
     Notes
     -----
@@ -136,24 +118,10 @@ def largest_connected_component_size(G):
     (undirected) component. 
     
     '''
-    # case of not empty graph
-    if G.number_of_nodes() > 0 :
-        # divide the case of directed and undirected graphs because of the difference
-        # in the definition of the connected components
-        if G.is_directed() : 
-            largest_cc = max(nx.weakly_connected_components(G), key=len)
-            
-        else : # undirected case
-            largest_cc = max(nx.connected_components(G), key=len)
-            
-        largest_cc_size = len(largest_cc)
-        result = largest_cc_size/nx.number_of_nodes(G)
-        
-    else: # empty graph
-        result = 0
-        
-    return result
+    largest_cc_size, _ = fragmentation(G)
+    return largest_cc_size
 
+@accepts_csr
 def average_size_connected_components(G):
     '''
     Calculate the average size among all the connected components of the network, 
@@ -161,8 +129,8 @@ def average_size_connected_components(G):
     
     Parameters
     ----------
-    G : networkx.classes.graph.Graph
-        The input graph.
+    G : networkx.classes.graph.Graph or scipy.sparse.csr_array
+        The input graph or its adjacency matrix (see 'graph_to_csr()').
 
     Returns
     -------
@@ -175,29 +143,64 @@ def average_size_connected_components(G):
     >>> nx.add_path(G, [10, 11, 12])
     >>> nx.add_path(G, [13])
     >>> average_size_connected_components(G)
-    2
+    2.0
     
     '''
-    # divide the case for directed and undirected graphs because of the difference
-    # in the definition of the connected components 
-    #(see docstring of 'largest_connected_component_size()')
-    if G.is_directed() : 
-        sizes = [len(c) for c in sorted(nx.weakly_connected_components(G), key=len)]
+    _, average_size = fragmentation(G)
+    return average_size
+
+@accepts_csr
+def fragmentation(G):
+    '''
+    Calculates both the size of the largest connected component (see 
+    'largest_connected_component_size()') and the average size of the other
+    components (see 'average_size_connected_components()') from a single 
+    labelling of the components.
+    
+    Parameters
+    ----------
+    G : networkx.classes.graph.Graph or scipy.sparse.csr_array
+        The input graph or its adjacency matrix (see 'graph_to_csr()').
+
+    Returns
+    -------
+    largest_cc_size : numpy.float64 or int
+        The size of the largest connected component normalised for the total 
+        number of nodes.
+    average_size : numpy.float64 or int
+        The average size of all the connected components, but the largest one.
         
-    else :  # undirected case
-        sizes = [len(c) for c in sorted(nx.connected_components(G), key=len)]
+    Examples
+    --------
+    >>> G = nx.path_graph(4)
+    >>> nx.add_path(G, [10, 11, 12])
+    >>> nx.add_path(G, [13])
+    >>> fragmentation(G)
+    (0.5, 2.0)
+    '''
+    # the components are labelled in a single call on the CSR arrays
+    if not sparse.issparse(G):
+        G = graph_to_csr(G)
+    
+    # case of empty graph
+    if G.shape[0] == 0:
+        return 0, 0
+    
+    # the weakly connected components of 'component_sizes_csr()' are the 
+    # connected components for undirected graphs
+    sizes = component_sizes_csr(G)
+    largest_size = sizes.max()
+    largest_cc_size = largest_size/G.shape[0]
         
-    # erase the biggest (the last one) because we are interested in the behaviour 
-    # of all the other components
-    sizes_without_the_biggest = sizes[:-1]
-    
-    if len(sizes_without_the_biggest) == 0: 
+    if len(sizes) < 2: 
         average_size = 0
         
     else: 
-        average_size = np.mean(sizes_without_the_biggest)
+        # erase the biggest because we are interested in the behaviour of 
+        # all the other components: no sorting is needed
+        average_size = (sizes.sum() - largest_size)/(len(sizes) - 1)
         
-    return average_size
+    return largest_cc_size, average_size
     
     
 #-------------------------------EPIDEMIC FEATURES------------------------------
@@ -227,7 +230,7 @@ def peak(infection_evolution):
     --------
     >>> infected = np.array([0, 20, 50, 30, 10])
     >>> peak(infected)
-    >>> 50
+    50
     '''
     
     # If the input is a 1D array, convert it to a 2D matrix with a single row
@@ -271,7 +274,7 @@ def t_peak(infection_evolution):
     --------
     >>> infected = np.array([0, 20, 50, 30, 10])
     >>> t_peak(infected)
-    >>> 2
+    2
     '''
     
     # If the input is a 1D array, convert it to a 2D matrix with a single row
@@ -292,8 +295,10 @@ def epidemic_duration (infection_evolution):
     '''
     Calculates the duration of the epidemic based on the infection evolution.
 
-    The duration is determined as the time between the first and last non-zero 
-    infection values.
+    The duration is the number of time steps from the first to the last 
+    non-zero infection value, both included: the steps without infected cases
+    between them are counted too. An evolution without infected cases has 
+    duration 0.
 
     If the input is a 1D array, it calculates the duration for that single simulation.
     If the input is a 2D array, where each row corresponds to a single simulation,
@@ -320,13 +325,18 @@ def epidemic_duration (infection_evolution):
                              [0, 15, 35, 40, 0],
                              [10, 30, 70, 40, 50]])
     >>> epidemic_duration(infected)
-    >>> 4.0
+    4.0
         
     Notes: 
     -----
     According to the 'SIR model', once the epidemic ends it cannot restars 
     spontaneously. So the end of the epidemic is reached by the absence of 
     infected cases.
+    
+    Earlier versions counted only the time steps with infected cases. The two
+    definitions give the same result for the evolutions of the 'SIR model',
+    which have no zeros inside the epidemic, but they differ for series with
+    gaps: [5, 0, 0, 3] lasts 4 time steps, not 2.
     '''
     
     # If the input is a 1D array, convert it to a 2D matrix with a single row
@@ -335,7 +345,12 @@ def epidemic_duration (infection_evolution):
     if infection_evolution.ndim == 1:
         infection_evolution = infection_evolution[np.newaxis, :]
     
-    durations = np.count_nonzero(infection_evolution, axis=1)
+    # first and last time step with infected cases, found with 'np.argmax' 
+    # on the boolean mask read from both ends
+    infected = infection_evolution != 0
+    first = np.argmax(infected, axis=1)
+    last = infected.shape[1] - 1 - np.argmax(infected[:, ::-1], axis=1)
+    durations = np.where(infected.any(axis=1), last - first + 1, 0)
     
     # If the original input was 1D, return a single value instead of an array
     # If it was 2D, return the average value over all the simulation
@@ -393,9 +408,79 @@ def total_infected(infection_evolution, recovery_evolution):
         return  totals[0]
     else: 
         return np.mean(totals)
+
+def epidemic_features(infection_evolution, recovery_evolution):
+    '''
+    Calculates all the epidemic features ('peak()', 't_peak()', 
+    'epidemic_duration()' and 'total_infected()') from the same simulations.
+    
+    Used as 'feature' of 'epidemic_feature_analysis()', it gets the four
+    features from a single sweep of removals and epidemics.
+
+    Parameters
+    ----------
+    infection_evolution : numpy.ndarray
+        A 1D array (single simulation) or 2D array (multiple simulations) with
+        the infected nodes over time.
+        
+    recovery_evolution : numpy.ndarray
+        A 1D array (single simulation) or 2D array (multiple simulations) with
+        the recovered nodes over time.
+
+    Returns
+    -------
+    tuple
+        The values of 'peak', 't_peak', 'epidemic_duration' and 
+        'total_infected', in this order.
+        
+    Examples
+    --------
+    >>> infected = np.array([0, 20, 50, 30, 10])
+    >>> recovered = np.array([0, 10, 20, 50, 90])
+    >>> epidemic_features(infected, recovered)
+    (50, 2, 4, 100)
+    '''
+    return (peak(infection_evolution), 
+            t_peak(infection_evolution), 
+            epidemic_duration(infection_evolution), 
+            total_infected(infection_evolution, recovery_evolution))
     
 # ------------------------------ANALYSIS FUNCTIONS-----------------------------
 
+def _run_sweeps(sweeps, n_jobs = 1):
+    '''
+    Runs independent removal sweeps, in parallel processes if 'n_jobs' > 1.
+
+    Parameters
+    ----------
+    sweeps : list of tuple
+        Each element is '(method, args)': the sweep is 'method(*args)'.
+    
+    n_jobs : int, optional
+        Number of processes. With 1 (default) the sweeps run sequentially in 
+        the current process; with -1 all the CPU cores are used.
+
+    Returns
+    -------
+    list
+        The results of the sweeps, in the same order of 'sweeps'.
+        
+    Raises
+    ------
+    ValueError
+        If 'n_jobs' is neither -1 nor a positive integer.
+    '''
+    if n_jobs != -1 and n_jobs < 1:
+        raise ValueError(f"'n_jobs' must be -1 or a positive integer, not {n_jobs}")
+    
+    if n_jobs == 1:
+        return [method(*args) for method, args in sweeps]
+    
+    max_workers = None if n_jobs == -1 else n_jobs
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(method, *args) for method, args in sweeps]
+        return [future.result() for future in futures]
+
 
 def generate_network(network_type, *kwargs):
     """
@@ -436,13 +521,20 @@ def generate_network(network_type, *kwargs):
     elif network_type == "airports":
         CURRENT_DIR = os.path.dirname(__file__)#
         MAIN_DIR = os.path.abspath(os.path.join(CURRENT_DIR, '.'))#
-        GPICKLE_PATH = os.path.join(MAIN_DIR, 'flight.gpickle')
-
-        with open(GPICKLE_PATH, 'rb') as f:
-            G = pickle.load(f)
+        NPZ_PATH = os.path.join(MAIN_DIR, 'flight.npz')
+
+        # the network is stored as its CSR adjacency matrix (see 
+        # 'flight_data_cleaning.py'), with the airport ID of each row
+        data = np.load(NPZ_PATH)
+        A = sparse.csr_array((data['data'], data['indices'], data['indptr']), 
+                             shape=tuple(data['shape']))
+        G = nx.from_scipy_sparse_array(A)
+        # the nodes are labeled with the airport IDs, keeping the order of 
+        # the rows
+        G = nx.relabel_nodes(G, dict(enumerate(data['airport_ids'].tolist())))
         return G
             
-def connectivity_analysis(sim, random_seed = None):
+def connectivity_analysis(sim, random_seed = None, n_jobs = 1):
     '''
     Analyzes the diameter of a network under the increasing of node removals 
     due to errors and attacks.
@@ -458,6 +550,11 @@ def connectivity_analysis(sim, random_seed = None):
         
     random_seed : int
         For reproducibility
+    
+    n_jobs : int, optional
+        Number of processes running the independent sweeps in parallel. 
+        With 1 (default) they run sequentially; with -1 all the CPU cores 
+        are used. Set 'random_seed' to get the same results in both cases.
         
     Returns
     -------
@@ -474,12 +571,14 @@ def connectivity_analysis(sim, random_seed = None):
     
     '''
     
-    freq, results_error = sim.graph_property_vs_removals(diameter, error, random_seed)
-    _, results_attack = sim.graph_property_vs_removals(diameter, attack, random_seed)
+    (freq, results_error), (_, results_attack) = _run_sweeps([
+        (sim.graph_property_vs_removals, (diameter, error, random_seed)),
+        (sim.graph_property_vs_removals, (diameter, attack, random_seed)),
+        ], n_jobs)
     
     return freq, results_error, results_attack
     
-def fragmentation_analysis(sim, random_seed = None):
+def fragmentation_analysis(sim, random_seed = None, n_jobs = 1):
     """
     Analyzes the fragmentation of a network under node removals due to errors 
     and attacks.
@@ -499,6 +598,11 @@ def fragmentation_analysis(sim, random_seed = None):
     
     random_seed : int
         For reproducibility
+    
+    n_jobs : int, optional
+        Number of processes running the independent sweeps in parallel. 
+        With 1 (default) they run sequentially; with -1 all the CPU cores 
+        are used. Set 'random_seed' to get the same results in both cases.
         
     Returns
     -------
@@ -521,17 +625,19 @@ def fragmentation_analysis(sim, random_seed = None):
         Average size of non-giant connected components at each removal frequency 
         under targeted attacks.
     """
-    # data for S
-    freq, S_error = sim.graph_property_vs_removals(largest_connected_component_size, error, random_seed)
-    _, S_attack = sim.graph_property_vs_removals(largest_connected_component_size, attack, random_seed)
-
-    # data for <s>
-    _, s_error = sim.graph_property_vs_removals(average_size_connected_components, error, random_seed)
-    _, s_attack = sim.graph_property_vs_removals(average_size_connected_components, attack, random_seed)
+    # data for S and <s>: both come from the same removals and components, 
+    # so a single sweep is run for each strategy
+    (freq, fragmentation_error), (_, fragmentation_attack) = _run_sweeps([
+        (sim.graph_property_vs_removals, (fragmentation, error, random_seed)),
+        (sim.graph_property_vs_removals, (fragmentation, attack, random_seed)),
+        ], n_jobs)
+    
+    S_error, s_error = (list(values) for values in zip(*fragmentation_error))
+    S_attack, s_attack = (list(values) for values in zip(*fragmentation_attack))
 
     return freq, S_error, S_attack, s_error, s_attack
 
-def epidemic_feature_analysis(sim, feature, num_simulations = 100, random_seed = None):
+def epidemic_feature_analysis(sim, feature, num_simulations = 100, random_seed = None, n_jobs = 1):
     """
     Analyzes how an epidemic feature evolves as nodes are progressively removed
     from the network due to errors or targeted attacks.
@@ -548,10 +654,16 @@ def epidemic_feature_analysis(sim, feature, num_simulations = 100, random_seed =
 
     feature : function
         A function that computes the epidemic metric of interest (e.g. total_infected,
-        epidemic_duration, peak, t_peak) on simulation results.
+        epidemic_duration, peak, t_peak) on simulation results. With 
+        'epidemic_features' all the four metrics come from the same sweeps.
     
     random_seed : int
         For reproducibility
+    
+    n_jobs : int, optional
+        Number of processes running the independent sweeps in parallel. 
+        With 1 (default) they run sequentially; with -1 all the CPU cores 
+        are used. Set 'random_seed' to get the same results in both cases.
 
     Returns
     -------
@@ -563,9 +675,22 @@ def epidemic_feature_analysis(sim, feature, num_simulations = 100, random_seed =
 
     results_attack : list of float
         Values of the epidemic metric computed at each removal frequency under targeted attacks.
+
+    Notes
+    -----
+    If 'feature' returns a tuple of metrics, as 'epidemic_features', 
+    'results_error' and 'results_attack' are tuples with the list of the 
+    values of each metric, in the same order.
     """
         
-    freq, results_error = sim.epidemic_property_vs_removals(feature, error, num_simulations, random_seed)
-    _, results_attack = sim.epidemic_property_vs_removals(feature, attack, num_simulations, random_seed)
+    (freq, results_error), (_, results_attack) = _run_sweeps([
+        (sim.epidemic_property_vs_removals, (feature, error, num_simulations, random_seed)),
+        (sim.epidemic_property_vs_removals, (feature, attack, num_simulations, random_seed)),
+        ], n_jobs)
+    
+    # one list for each metric, instead of one tuple for each frequency
+    if results_error and isinstance(results_error[0], tuple):
+        results_error = tuple(list(values) for values in zip(*results_error))
+        results_attack = tuple(list(values) for values in zip(*results_attack))
     
     return freq, results_error, results_attack
\ No newline at end of file
@@ -1,16 +1,17 @@
 """
 
 This file downloads the data of the global airlines and cleans them.
-Then it creates a graph of type "classes.graph.Graph" and saves it as gpickle 
-file under the name "flight"
+Then it builds the adjacency matrix of the network of the airports in CSR 
+format and saves it as npz file under the name "flight", together with the
+OpenFlights ID of the airport of each row
 
 """
 
 import os
+import numpy as np
 import pandas as pd
-import networkx as nx
 import zipfile
-import pickle
+from scipy import sparse
 
 
 # Path to ZIP file: 'airports_network.zip' should be in the 'data' folder as
@@ -22,28 +23,50 @@ file_name = 'airports_network.zip'
 zip_path = os.path.join(script_dir, data_dir, file_name)
 
 
-# open zip file and read the CSV
+# open zip file and read the CSV: only the columns used to build the network
+# are parsed
 with zipfile.ZipFile(zip_path, 'r') as z:
     with z.open('routes.csv') as file1:
-        routes=pd.read_csv(file1, delimiter=',', na_values=r'\N')
+        routes=pd.read_csv(file1, delimiter=',', na_values=r'\N',
+                           usecols=['Source airport ID', 'Destination airport ID'])
     with z.open('airports.csv') as file2:
-        airports=pd.read_csv(file2, delimiter=',', na_values=r'\N')
+        airports=pd.read_csv(file2, delimiter=',', na_values=r'\N',
+                             usecols=['Airport ID'])
 
 # cleaning data: erase routes if the source or the destination is NAN
 routes_clean = routes.dropna(subset=['Source airport ID', 'Destination airport ID'])
 # cleaning data: erase all airport information if its ID is NAN
 airports_clean = airports.dropna(subset = ['Airport ID'])
-# clening data: erase all the routes that have only either the destination or the starting airport
-routes_clean2 = routes_clean.drop(routes_clean[~routes_clean['Source airport ID'].isin(airports_clean['Airport ID']) | ~routes_clean['Destination airport ID'].isin(airports_clean['Airport ID'])].index)
+# clening data: keep only the routes whose destination and starting airport 
+# are both known, selected with a single boolean mask
+airport_ids = pd.Index(airports_clean['Airport ID'])
+known_routes = (routes_clean['Source airport ID'].isin(airport_ids) 
+                & routes_clean['Destination airport ID'].isin(airport_ids))
+routes_clean2 = routes_clean[known_routes]
 
-# creation of the dictionary for the airports positions
-air_pos = dict(zip(airports_clean['Airport ID'], zip(airports_clean['Longitude'], airports_clean['Latitude'])))
+# creation of the network from the cleaned dataset: the two ID columns are 
+# taken as integer arrays instead of iterating the rows of the dataframe
+edges = routes_clean2[['Source airport ID', 'Destination airport ID']].to_numpy(dtype=np.int32)
+# the airports are numbered in order of first appearance in the routes, as the
+# nodes of a graph built with 'nx.from_edgelist()'
+nodes, airports_in_routes = pd.factorize(edges.ravel())
+nodes = nodes.reshape(-1, 2)
+number_of_airports = len(airports_in_routes)
 
-# creation of a graph from the cleaned dataset
-G = nx.from_pandas_edgelist(routes_clean2, source = 'Source airport ID', target = 'Destination airport ID')
+# the adjacency matrix is built directly in CSR format: the network is 
+# undirected and the many routes between two airports are a single edge
+A = sparse.csr_array((np.ones(len(nodes), dtype=bool), (nodes[:, 0], nodes[:, 1])), 
+                     shape=(number_of_airports, number_of_airports))
+A = (A + A.T).astype(np.int8)
 
-# save the graph 'G'
-with open('flight.gpickle', 'wb') as f:
-    pickle.dump(G, f, pickle.HIGHEST_PROTOCOL)
+# save the adjacency matrix: the two int32 index arrays of the CSR format are 
+# smaller and faster to load than a pickled graph. The airport IDs map each
+# row back to its airport, as the node labels of the graph did
+np.savez_compressed(os.path.join(script_dir, 'network_code', 'flight.npz'),
+                    indptr=A.indptr.astype(np.int32), 
+                    indices=A.indices.astype(np.int32),
+                    data=A.data, 
+                    shape=A.shape,
+                    airport_ids=airports_in_routes.astype(np.int64))
 
 
@@ -4,9 +4,8 @@ This script define some useful functions to plot data using a predefined format
 
 '''
 
-import matplotlib.pyplot as plt
 import networkx as nx
-import time
+import numpy as np
 
 def plot_multiple_data(x_data, y_data, labels, colors=None, markers=None, linestyles=None,
                        ylabel='y', xlabel='x', title='x v/s y'):
@@ -42,6 +41,10 @@ def plot_multiple_data(x_data, y_data, labels, colors=None, markers=None, linest
         The matplotlib Axes object containing the plot.
 
     '''
+    # matplotlib is imported only when something is plotted: importing it 
+    # takes longer than all the rest of the package
+    import matplotlib.pyplot as plt
+    
     fig, ax = plt.subplots()
     
     # Iterate over each data series and plot
@@ -207,7 +210,7 @@ def make_plot_2networks(freq, data_error_ER, data_attack_ER, data_error_SF, data
                     )
     return fig, ax
 
-def display_epidemic(graph, states, layout):
+def display_epidemic(graph, states, layout, time = 0, nodes = None):
     '''
     Displays the graph structure with the nodes colors representing their state
     at each time step:
@@ -218,9 +221,9 @@ def display_epidemic(graph, states, layout):
     Parameters
     ----------
     graph : networkx.classes.graph.Graph
-        The graph on which the epidemic is run.
+        The graph on which the epidemic is run, with nodes labeled from 0.
     
-    states : np.array or list
+    states : np.array
          Each element of the `states` can be (-1,0,1). It stores the states of 
          the network nodes.
          That means: if the first element is `0`, then the node labeled as 'zero'
@@ -228,20 +231,42 @@ def display_epidemic(graph, states, layout):
          
     layout : dict
         Fixes the layout/disposition of the graph
+        
+    time : int, optional
+        The time step shown in the title (default is 0).
+        
+    nodes : matplotlib.collections.PathCollection, optional
+        The nodes drawn by a previous call. If None (default) a new figure 
+        is made with the edges and the labels of the graph.
          
     Returns
     -------
-    None.
+    nodes : matplotlib.collections.PathCollection
+        The drawn nodes, to pass to the next call.
     
     Note: 
     -----
-    The plot is not returned as a figure but directly shown up.
+    The edges and the labels don't change during the epidemic: they are drawn 
+    only once, and the next calls just recolor the nodes of the same figure.
 
     '''
-    node_colors = ['red' if states[node] == 1 else 'green' if states[node] == -1 else 'skyblue' for node in graph.nodes()]
-    nx.draw(graph, layout, with_labels=True, node_color=node_colors)
-    plt.title(f"Time = {time}, SIR model")
-    plt.show() 
+    import matplotlib.pyplot as plt
     
+    # susceptible (0), infected (1) and recovered (-1, the last color) nodes:
+    # the states are read at the labels of the nodes of the graph, which can
+    # be fewer than the states after some nodes have been removed
+    node_states = np.asarray(states, dtype=int)[list(graph.nodes())]
+    node_colors = np.array(['skyblue', 'red', 'green'])[node_states]
+    
+    if nodes is None:
+        fig, ax = plt.subplots()
+        nx.draw_networkx_edges(graph, layout, ax=ax)
+        nx.draw_networkx_labels(graph, layout, ax=ax)
+        nodes = nx.draw_networkx_nodes(graph, layout, node_color=node_colors, ax=ax)
+    else:
+        nodes.set_color(node_colors)
+        
+    nodes.axes.set_title(f"Time = {time}, SIR model")
+    plt.pause(0.01)
+    return nodes
     
-
@@ -6,8 +6,52 @@
 
 
 import random 
+import numpy as np
+from scipy import sparse
+from .sparse_functions import accepts_csr, remove_nodes_csr, degrees_csr
 
-def attack(G, num_attacks = 1):
+def top_degree_nodes(degrees, k):
+    '''
+    Finds the indices of the 'k' nodes with the highest degree.
+
+    The nodes are found with a partial selection, in linear time, and only 
+    the nodes whose degree is at least the k-th highest one are sorted. 
+    Ties are broken by the order of the nodes, as in 'sorted()'.
+
+    Parameters
+    ----------
+    degrees : numpy.ndarray
+        The degree of each node.
+    
+    k : int
+        The number of nodes to select.
+
+    Returns
+    -------
+    numpy.ndarray
+        The indices of the 'k' most connected nodes, by decreasing degree.
+
+    Examples
+    --------
+    >>> top_degree_nodes(np.array([1, 3, 2, 3]), 2)
+    array([1, 3])
+    '''
+    if k <= 0:
+        return np.array([], dtype=np.int64)
+    if k >= len(degrees):
+        return np.argsort(-degrees, kind='stable')
+    # a single pass: 'np.argmax' returns the first of the tied nodes
+    if k == 1:
+        return np.array([np.argmax(degrees)])
+    
+    # all the nodes with a degree at least equal to the k-th highest one
+    threshold = np.partition(degrees, len(degrees) - k)[len(degrees) - k]
+    candidates = np.flatnonzero(degrees >= threshold)
+    order = np.argsort(-degrees[candidates], kind='stable')
+    return candidates[order[:k]]
+
+@accepts_csr
+def attack(G, num_attacks = 1, degrees = None, order = None):
     '''
     Perform multiple attacks on the input graph 'G' by removing the most 
     connected nodes (highest degree).
@@ -16,18 +60,31 @@ def attack(G, num_attacks = 1):
 
     Parameters
     ----------
-    G : networkx.classes.graph.Graph
-        The input graph from which the most connected nodes are to be removed.
+    G : networkx.classes.graph.Graph or scipy.sparse.csr_array
+        The input graph from which the most connected nodes are to be removed,
+        or its adjacency matrix (see 'graph_to_csr()').
     
     num_attacks : int, optional
         The number of most connected nodes to remove from the graph. The default 
         value is 1.
+    
+    degrees : dict or numpy.ndarray, optional
+        The degrees of the nodes of 'G', as 'dict(G.degree())' for graphs or 
+        'degrees_csr(G)' for adjacency matrices. Pass them to avoid computing 
+        them again when attacking the same network many times. If None 
+        (default) they are computed from 'G'.
+        
+    order : numpy.ndarray, optional
+        The node positions sorted by decreasing degree, from 
+        'np.argsort(-degrees, kind='stable')'. The first 'num_attacks' nodes 
+        are removed and 'degrees' is not used. Pass it to attack the same 
+        network many times with a single sort.
         
     Returns
     -------
-    G_with_attacks : networkx.classes.graph.Graph
+    G_with_attacks : networkx.classes.graph.Graph or scipy.sparse.csr_array
         A copy of the input graph after the specified number of most connected 
-        nodes have been removed.
+        nodes have been removed. It has the same type of 'G'.
 
     Examples
     --------
@@ -41,18 +98,47 @@ def attack(G, num_attacks = 1):
     The function performs attacks by removing nodes with the highest degree 
     first. In case of ties (multiple nodes having the same degree), the nodes 
     are removed in the order they appear after being sorted by 'sorted()'.
+    Only the 'num_attacks' most connected nodes are selected, without sorting
+    the whole network.
 
     '''
+    # no attacks: the degrees are not needed
+    if num_attacks == 0:
+        return G.copy()
+    
+    if sparse.issparse(G):
+        if order is not None:
+            return remove_nodes_csr(G, order[:num_attacks])
+        # stable sort: ties are broken by the order of the nodes as in 'sorted()'
+        if degrees is None:
+            degrees = degrees_csr(G)
+        return remove_nodes_csr(G, top_degree_nodes(degrees, num_attacks))
+    
     G_with_attacks = G.copy()
     
-    degrees = dict(G_with_attacks.degree())
-    top_n_nodes = sorted(degrees, key=degrees.get, reverse=True)[:num_attacks]
+    if order is not None:
+        nodes = list(G_with_attacks.nodes())
+        G_with_attacks.remove_nodes_from([nodes[i] for i in order[:num_attacks]])
+        return G_with_attacks
+    
+    # the degrees are read straight into an array, without building a dict
+    if degrees is None:
+        nodes = list(G_with_attacks.nodes())
+        degree_values = np.fromiter((d for _, d in G_with_attacks.degree()), 
+                                    dtype=np.int64, count=len(nodes))
+    else:
+        nodes = list(degrees)
+        degree_values = np.fromiter(degrees.values(), dtype=np.int64, count=len(nodes))
+    # same result of 'sorted(..., reverse=True)[:num_attacks]' without sorting
+    # all the nodes: the selection runs on the array of the degrees
+    top_n_nodes = [nodes[i] for i in top_degree_nodes(degree_values, num_attacks)]
     
     G_with_attacks.remove_nodes_from(top_n_nodes)
     
     return G_with_attacks
     
-def error(G, num_errors = 1):
+@accepts_csr
+def error(G, num_errors = 1, permutation = None):
     '''
     Perform multiple errors on a copy of the input graph 'G' by randomly 
     removing nodes.
@@ -60,17 +146,24 @@ def error(G, num_errors = 1):
 
     Parameters
     ----------
-    G : networkx.classes.graph.Graph
-        The input graph from which edges are to be removed.
+    G : networkx.classes.graph.Graph or scipy.sparse.csr_array
+        The input graph from which edges are to be removed, or its adjacency
+        matrix (see 'graph_to_csr()').
         
     num_errors : int, optional
         The number of nodes to remove from the graph. The default value is 1.
         
+    permutation : numpy.ndarray, optional
+        A random permutation of the node positions, from 'np.random.permutation'.
+        The first 'num_errors' nodes are removed. Pass the same permutation 
+        to remove nested sets of nodes from the same network, drawn only 
+        once. If None (default) the nodes are sampled with 'random.sample()'.
+        
     Returns
     -------
-    G_with_errors : networkx.classes.graph.Graph
+    G_with_errors : networkx.classes.graph.Graph or scipy.sparse.csr_array
         A copy of the input graph after the specified number of nodes have been 
-        randomly removed.
+        randomly removed. It has the same type of 'G'.
 
     Examples
     --------
@@ -80,11 +173,20 @@ def error(G, num_errors = 1):
     95
     
     '''
+    if sparse.issparse(G):
+        if permutation is not None:
+            return remove_nodes_csr(G, permutation[:num_errors])
+        # same draw of 'random.sample()' on the list of nodes, but on the row indices
+        nodes_to_remove = random.sample(range(G.shape[0]), num_errors)
+        return remove_nodes_csr(G, nodes_to_remove)
     
     G_with_errors = G.copy()
     
     nodes = list(G_with_errors.nodes())
-    nodes_to_remove = random.sample(nodes, num_errors)
+    if permutation is not None:
+        nodes_to_remove = [nodes[i] for i in permutation[:num_errors]]
+    else:
+        nodes_to_remove = random.sample(nodes, num_errors)
     
     G_with_errors.remove_nodes_from(nodes_to_remove)
     
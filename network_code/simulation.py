@@ -10,8 +10,9 @@ import networkx as nx
 import numpy as np
 import random as rn
 import inspect
-import matplotlib.pyplot as plt
+from scipy import sparse
 from .plot_functions import display_epidemic
+from .sparse_functions import graph_to_csr, degrees_csr
 
 
 class GetRemotionFrequencies: 
@@ -91,9 +92,12 @@ class GetRemotionFrequencies:
         '''
         frequencies = np.linspace(0, self.max_removal_rate, self.num_points)
         num_removals = (frequencies * self.number_of_nodes).astype(int)
+        # a removal rate above 1 can't remove more nodes than the network has
+        num_removals = num_removals.clip(0, self.number_of_nodes)
 
-        # avoid the repetition of equal numbers in num_errors
-        num_removals_cleaned = np.unique(num_removals)
+        # avoid the repetition of equal numbers in num_errors: the numbers are
+        # already sorted, so each one is only compared with the previous one
+        num_removals_cleaned = num_removals[np.diff(num_removals, prepend=-1) != 0]
         frequencies_cleaned = (1/self.number_of_nodes)*num_removals_cleaned
         return frequencies_cleaned, num_removals_cleaned
 
@@ -106,6 +110,10 @@ class ToleranceSimulation(GetRemotionFrequencies):
     ----------
     G : networkx.Graph
         The input network graph on which running the simulation.
+    csr : scipy.sparse.csr_array
+        The adjacency matrix of 'G', built once and used for all the removals.
+    degrees : numpy.ndarray
+        The degrees of the nodes of 'csr', computed once.
         
     All the attributes included in the 'GetRemotionFrequencies' class 
     
@@ -117,6 +125,12 @@ class ToleranceSimulation(GetRemotionFrequencies):
     Notes
     -----
     This class is connected to 'GetRemotionFrequencies' by inheritance.
+    
+    When both the removal and the property function are marked with 
+    'accepts_csr()', as 'attack', 'error', 'diameter' and the component 
+    functions are, they work on the adjacency matrix 'csr' instead of the 
+    networkx graph: this avoids copying the dict-of-dicts adjacency of 'G' at
+    each removal frequency. Any other function gets the networkx graph.
     '''
     
     def __init__(self, G, max_removal_rate = 0.5, num_points = 15):
@@ -136,6 +150,8 @@ class ToleranceSimulation(GetRemotionFrequencies):
         '''
         super().__init__(G, max_removal_rate, num_points)
         self.G = G
+        self.csr = graph_to_csr(G)
+        self.degrees = degrees_csr(self.csr, G.is_directed())
         
     def graph_property_vs_removals(self, property_function, removal_function, random_seed = None):
         '''
@@ -167,12 +183,21 @@ class ToleranceSimulation(GetRemotionFrequencies):
         Examples
         --------
         >>> G = nx.erdos_renyi_graph(100, 0.05)
-        >>> freq, diam = ToleranceSimulation(G, num_points = 5).graph_property_vs_removals(get_diameter, attack)
+        >>> freq, diam = ToleranceSimulation(G, num_points = 5).graph_property_vs_removals(diameter, attack)
         >>> freq
         array([0.  , 0.01, 0.02, 0.03, 0.05])
         >>> diam
         [3.3, 3.3, 3.4, 3.5, 3.6]
         
+        Functions not marked with 'accepts_csr()' get the networkx graph:
+        
+        >>> freq, density = ToleranceSimulation(G, num_points = 5).graph_property_vs_removals(nx.density, attack)
+        
+        Notes
+        -----
+        The adjacency matrix 'csr' is used only when both the functions are 
+        marked with 'accepts_csr()'; otherwise the removals are applied on 
+        the networkx graph 'G'.
         '''
         if random_seed is not None:
             rn.seed(random_seed)
@@ -180,9 +205,37 @@ class ToleranceSimulation(GetRemotionFrequencies):
             
         property_values = []
         
+        # the adjacency matrix is used only if both the functions can take it
+        use_csr = (getattr(removal_function, 'accepts_csr', False) and 
+                   getattr(property_function, 'accepts_csr', False))
+        
+        # the removal functions that use the node degrees get the ones of the 
+        # original network, computed only once: an array for the matrix, a 
+        # dict as 'G.degree()' for the graph
+        removal_parameters = inspect.signature(removal_function).parameters
+        removal_kwargs = {}
+        if 'degrees' in removal_parameters:
+            removal_kwargs['degrees'] = self.degrees if use_csr else dict(zip(self.G.nodes(), self.degrees.tolist()))
+        # and the ones that take the nodes by decreasing degree get them sorted
+        # once: each frequency removes the first nodes of this order
+        if 'order' in removal_parameters:
+            removal_kwargs['order'] = np.argsort(-self.degrees, kind='stable')
+        # the random removal functions draw a single order of the nodes: each
+        # frequency removes the first nodes of it, without sampling again
+        if 'permutation' in removal_parameters:
+            removal_kwargs['permutation'] = np.random.permutation(self.number_of_nodes)
+        
         for i in self.num_removals_cleaned:
-            G_modified = removal_function(self.G, i)
-            property_values.append(property_function(G_modified))
+            if not use_csr:
+                G_modified = removal_function(self.G, i, **removal_kwargs)
+                property_values.append(property_function(G_modified))
+            # without removals the property is computed on the original matrix,
+            # which is never modified, instead of a copy
+            elif i == 0:
+                property_values.append(property_function(self.csr))
+            else:
+                csr_modified = removal_function(self.csr, i, **removal_kwargs)
+                property_values.append(property_function(csr_modified))
          
         return self.frequencies_cleaned, property_values
     
@@ -209,15 +262,23 @@ class SIR_Model():
         Initializes the infection state by randomly infecting a set number of 
         nodes.
 
-    evolution(G, plot_spread=False):
+    evolution(G, plot_spread=False, edges=None):
         Simulates the evolution of the epidemic using the SIR model.
+        
+    evolution_batch(G, num_simulations, edges=None):
+        Simulates many independent epidemics at once on the same network.
+        
+    get_edges(G):
+        Builds the arrays of the endpoints of the edges of the network.
 
-    get_infected(G, state):
-        Updates the infection state of the network using a for loop over 
-        discordant links.
+    get_infected(u, v, state):
+        Updates the infection state of the network over the discordant links.
 
-    get_recovered(starting_state, final_state):
+    get_recovered(infected_nodes, final_state):
         Updates the state of the network by assigning immunity to infected nodes.
+        
+    step(u, v, state):
+        Performs one time step of the epidemic: infection and recovery.
 
     '''
     def __init__(self, G, mu, nu, duration, infected_t0):
@@ -252,14 +313,15 @@ class SIR_Model():
         Returns:
         -------
         state : numpy.ndarray
-            The array representing the initial infection state of the network.
+            The array representing the initial infection state of the network, 
+            as 'int8' since each node can only be in the states -1, 0 or 1.
         '''
-        state = np.zeros(self.number_of_nodes)
+        state = np.zeros(self.number_of_nodes, dtype=np.int8)
         infected_index = np.random.randint(0, self.number_of_nodes, self.infected_t0)
         state[infected_index] = 1
         return state
     
-    def evolution(self, G, plot_spread = False):
+    def evolution(self, G, plot_spread = False, edges = None):
         '''
         Simulates the evolution of the epidemic using the SIR model.
         
@@ -280,10 +342,15 @@ class SIR_Model():
         
         Parameters:
         ----------
-        G : networkx.Graph
-            The input network graph.
-            plot_spread : bool, optional
+        G : networkx.Graph or scipy.sparse.csr_array
+            The input network graph or its adjacency matrix. The plot needs
+            the graph.
+        plot_spread : bool, optional
             If True, plots the spread of the epidemic over time (default is False).
+        edges : tuple of numpy.ndarray, optional
+            The arrays of the edge endpoints of 'G' as returned by 'get_edges()'.
+            Pass them to avoid rebuilding them when running many epidemics 
+            on the same network (default is None).
 
        Returns:
        -------
@@ -299,6 +366,9 @@ class SIR_Model():
        cannot recover the nodes that have been infected during the same 
        time step. So it only works on nodes infected at leat from 1 time step. 
        
+       Once no node is infected the epidemic is over: the remaining time steps
+       keep the last values without being simulated.
+       
        The plotting functionality needs a lot of power and time. 
        The plots are thought to provide a visual understanding of the epidemic 
        dynamics and not to analyze it. When you use it, make sure to have small
@@ -306,37 +376,156 @@ class SIR_Model():
        '''
         state =  self.first_infection()
         
-        # In error/attack simulation relabeling prevent from incongruences between 
-        # indexes of the array 'state', that go from 0 to number of nodes of the
-        # actual graph, and the nodes labels of the first graph of the simulation.
-        # Maybe the index i in 'state' has been erased in the graph: this label
-        # would refer to nothing.
-        G = nx.convert_node_labels_to_integers(G)
+        # the edges don't change during the epidemic: the arrays of their 
+        # endpoints are built once and reused at each time step
+        if edges is None:
+            edges = self.get_edges(G)
+        u, v = edges
+        
+        # all the random draws of the epidemic are made at once, with one 
+        # outcome for each edge and each node at every time step
+        transmissions = np.random.random((self.duration, len(u))) < self.mu
+        immunities = np.random.random((self.duration, len(state))) < self.nu
         
         if plot_spread:
+            G = nx.convert_node_labels_to_integers(G)
             pos = nx.circular_layout(G)  # fixed layout for the graph
-            display_epidemic(G, state, pos) 
+            nodes = display_epidemic(G, state, pos) 
             
-        infection_rate = []
-        recovered_rate = []
+        # one value for each time step, assigned in place
+        infection_rate = np.empty(self.duration)
+        recovered_rate = np.empty(self.duration)
         
         for time in range(1, self.duration + 1):
             
-            infected_state = self.get_infected(G, state)
-        
-            recovered_state = self.get_recovered(state, infected_state)
-            
-            infection_rate.append(np.mean(recovered_state == 1))
-            recovered_rate.append(np.mean(recovered_state == -1))
+            state = self.step(u, v, state, transmissions[time - 1], immunities[time - 1])
             
-            state = recovered_state
+            # one pass over the states: -1, 0, 1 are counted in the bins 0, 1, 2
+            counts = np.bincount(state + 1, minlength=3)
+            infection_rate[time - 1] = counts[2]/len(state)
+            recovered_rate[time - 1] = counts[0]/len(state)
             
             if plot_spread:
-                display_epidemic(G, recovered_state, pos)
+                display_epidemic(G, state, pos, time, nodes)
+            
+            # without infected nodes the states can't change anymore: the 
+            # remaining time steps are filled without running them
+            if counts[2] == 0:
+                infection_rate[time:] = 0
+                recovered_rate[time:] = recovered_rate[time - 1]
+                break
                 
-        return np.array(infection_rate), np.array(recovered_rate)
+        return infection_rate, recovered_rate
+    
+    def evolution_batch(self, G, num_simulations, edges = None):
+        '''
+        Simulates 'num_simulations' independent epidemics on the same network
+        using the SIR model.
+        
+        The rules are the ones of 'evolution()', but the states of all the
+        epidemics are stacked in the rows of a single array: each time step
+        updates all the epidemics with the same array operations.
+        
+        A susceptible node with k infected neighbours escapes each of the k 
+        independent transmissions with probability (1 - mu)**k, so instead of
+        one draw per edge there is one draw per node: the k of all the nodes
+        and epidemics come from a single sparse matrix product.
         
-    def get_infected(self, G, starting_state):
+        Parameters:
+        ----------
+        G : networkx.Graph or scipy.sparse.csr_array
+            The input network graph or its adjacency matrix.
+        num_simulations : int
+            The number of independent epidemics.
+        edges : tuple of numpy.ndarray, optional
+            The arrays of the edge endpoints of 'G' as returned by 'get_edges()'
+            (default is None).
+
+        Returns:
+        -------
+        infection_rate : numpy.ndarray
+            The fraction of infected nodes over time, one row for each epidemic.
+        recovered_rate : numpy.ndarray
+            The fraction of recovered nodes over time, one row for each epidemic.
+            
+        Notes:
+        -----
+        The random draws of a time step are made for all the epidemics at
+        once, so the memory grows with 'num_simulations' times the number of
+        nodes.
+        '''
+        if edges is None:
+            edges = self.get_edges(G)
+        u, v = edges
+        
+        # symmetric adjacency matrix with one row for each node of 'state'
+        adjacency = sparse.csr_array((np.ones(2*len(u), dtype=np.int32), 
+                                      (np.concatenate((u, v)), np.concatenate((v, u)))),
+                                     shape=(self.number_of_nodes, self.number_of_nodes))
+        # probability of escaping the infection from k infected neighbours
+        escape = (1 - self.mu)**np.arange(self.number_of_nodes + 1)
+        
+        # one row for each epidemic, each with its own first infected nodes
+        state = np.zeros((num_simulations, self.number_of_nodes), dtype=np.int8)
+        infected_index = np.random.randint(0, self.number_of_nodes, (num_simulations, self.infected_t0))
+        state[np.arange(num_simulations)[:, np.newaxis], infected_index] = 1
+        
+        infection_rate = np.empty((num_simulations, self.duration))
+        recovered_rate = np.empty((num_simulations, self.duration))
+        
+        for time in range(self.duration):
+            # only the nodes infected before the transmission can recover 
+            infected_before = state == 1
+            
+            # number of infected neighbours of each node, in each epidemic
+            exposure = (adjacency @ infected_before.T.astype(np.int32)).T
+            transmission = np.random.random(state.shape) >= escape[exposure]
+            state[(state == 0) & transmission] = 1
+            
+            immunity = np.random.random(state.shape) < self.nu
+            state[infected_before & immunity] = -1
+            
+            infection_rate[:, time] = np.count_nonzero(state == 1, axis=1)/self.number_of_nodes
+            recovered_rate[:, time] = np.count_nonzero(state == -1, axis=1)/self.number_of_nodes
+            
+            # the loop stops when all the epidemics have ended
+            if not infection_rate[:, time].any():
+                infection_rate[:, time + 1:] = 0
+                recovered_rate[:, time + 1:] = recovered_rate[:, time, np.newaxis]
+                break
+            
+        return infection_rate, recovered_rate
+        
+    def get_edges(self, G):
+        '''
+        Builds the arrays of the endpoints of the edges of the network.
+        
+        Parameters:
+        ----------
+        G : networkx.Graph or scipy.sparse.csr_array
+            The input network graph or its adjacency matrix (see 
+            'graph_to_csr()').
+
+        Returns:
+        -------
+        u : numpy.ndarray
+            The first endpoint of each edge, as 'int32'.
+        v : numpy.ndarray
+            The second endpoint of each edge, as 'int32'.
+        '''
+        # The rows of the adjacency matrix are numbered from 0 in the order of 
+        # the nodes, as the indexes of the array 'state': the labels of the 
+        # nodes, maybe erased by error/attack, are never used. The conversion 
+        # avoids building one Python tuple for each edge of the graph.
+        if not sparse.issparse(G):
+            G = graph_to_csr(G)
+        
+        # each pair of connected nodes is taken once from the upper triangle, 
+        # without the self-loops: a node can't infect itself
+        edges = sparse.triu(G + G.T, k=1, format='coo')
+        return edges.row.astype(np.int32), edges.col.astype(np.int32)
+        
+    def get_infected(self, u, v, starting_state, transmission = None):
         '''
         Updates the infection state of the network.
         
@@ -347,10 +536,16 @@ class SIR_Model():
 
         Parameters:
         ----------
-        G : networkx.Graph
-            The input network graph.
+        u : numpy.ndarray
+            The first endpoint of each edge of the network.
+        v : numpy.ndarray
+            The second endpoint of each edge of the network.
         starting_state : numpy.ndarray
             The current state of the nodes.
+        transmission : numpy.ndarray of bool, optional
+            The outcome of the binomial process for each edge: True if the 
+            edge transmits the disease in this time step. If None (default)
+            it is drawn here.
 
         Returns:
         -------
@@ -360,21 +555,23 @@ class SIR_Model():
         state = starting_state
         # find all the pairs of nodes that are connected by an edge and in which
         # one of the two nodes is infected and the other susceptible
-        discordant_links = [(u, v) for u, v in G.edges() if state[u] + state[v] == 1]
-        transmission = np.random.binomial(1, self.mu, len(discordant_links))
+        discordant_links = np.flatnonzero(state[u] + state[v] == 1)
+        if transmission is None:
+            transmission = np.random.random(len(u)) < self.mu
             
-        #Update the infection status
-        for j, (u, v) in enumerate(discordant_links):
-            if transmission[j]:
-                state[u] = state[v] = 1 
+        #Update the infection status of both the endpoints of the links
+        # where the disease has been transmitted
+        infecting_links = discordant_links[transmission[discordant_links]]
+        state[u[infecting_links]] = 1
+        state[v[infecting_links]] = 1
         
         return state
 
-    def get_recovered(self, starting_state, final_state):
+    def get_recovered(self, infected_nodes, final_state, immunity = None):
         '''
         Updates the state of the network by assigning immunity to infected nodes.
 
-        This function identifies the nodes infected (before they have
+        This function takes the nodes infected (before they have
         trasmited the disease) and applies a binomial process to determine which 
         of these nodes become recovered. 
         Recovered nodes are then marked with a value of -1 only after the 
@@ -382,14 +579,17 @@ class SIR_Model():
         
         Parameters:
         ----------
-        starting_state : numpy.ndarray
-            The initial state of the network, where infected nodes are marked.
-            It is the array of the states before the infected nodes have 
-            trasmitted the disease with a value of 1.
+        infected_nodes : numpy.ndarray
+            The indices of the nodes that were infected before the infected 
+            nodes have trasmitted the disease.
         final_state : numpy.ndarray
             The state of the network to be updated with recovered nodes.
             It is the array of the states after the infected nodes have 
             trasmitted the disease.            
+        immunity : numpy.ndarray of bool, optional
+            The outcome of the binomial process for each node: True if the 
+            node recovers in this time step, when infected. If None (default)
+            it is drawn here.
 
         Returns:
         -------
@@ -397,11 +597,43 @@ class SIR_Model():
             The updated state of the network, with recovered nodes marked as -1.
 
         '''
-        infected_nodes = np.where(starting_state == 1)
-        immunity = np.random.binomial(1, self.nu, len(infected_nodes[0])).astype(bool)
-        recovered_nodes = infected_nodes[0][immunity]
+        if immunity is None:
+            immunity = np.random.random(len(final_state)) < self.nu
+        recovered_nodes = infected_nodes[immunity[infected_nodes]]
         final_state[recovered_nodes] = -1
         return final_state     
+    
+    def step(self, u, v, state, transmission = None, immunity = None):
+        '''
+        Performs one time step of the SIR model: the transmission of the 
+        disease followed by the recovery of the infected nodes.
+        
+        The state is updated in place, without copies.
+        
+        Parameters:
+        ----------
+        u : numpy.ndarray
+            The first endpoint of each edge of the network.
+        v : numpy.ndarray
+            The second endpoint of each edge of the network.
+        state : numpy.ndarray
+            The current state of the nodes.
+        transmission : numpy.ndarray of bool, optional
+            The transmitting edges, see 'get_infected()'.
+        immunity : numpy.ndarray of bool, optional
+            The recovering nodes, see 'get_recovered()'.
+
+        Returns:
+        -------
+        state : numpy.ndarray
+            The state of the nodes at the end of the time step.
+        '''
+        # only the nodes infected before the transmission can recover 
+        infected_nodes = np.flatnonzero(state == 1)
+        
+        state = self.get_infected(u, v, state, transmission)
+        state = self.get_recovered(infected_nodes, state, immunity)
+        return state
 
 class EpidemicToleranceSimulation(GetRemotionFrequencies):
     '''
@@ -415,6 +647,10 @@ class EpidemicToleranceSimulation(GetRemotionFrequencies):
     ----------
     G : networkx.Graph
         The input network graph.
+    csr : scipy.sparse.csr_array
+        The adjacency matrix of 'G', built once and used for all the removals.
+    degrees : numpy.ndarray
+        The degrees of the nodes of 'csr', computed once.
     epidemic_data : SIR_Model
         An instance of SIR_Model to simulate the epidemic on the network.
     All the attributes included in the 'GetRemotionFrequencies' class.
@@ -429,6 +665,10 @@ class EpidemicToleranceSimulation(GetRemotionFrequencies):
     -----
     This class is connected to 'GetRemotionFrequencies' by inheritance and to 
     SIR_Model by composition.
+    
+    A removal function marked with 'accepts_csr()', as 'attack' and 'error' 
+    are, works on the adjacency matrix 'csr'. Any other removal function 
+    gets the networkx graph.
     '''
     
     def __init__(self, G, mu, nu, duration, infected_t0, max_removal_rate = 0.5, num_points = 15):
@@ -455,6 +695,8 @@ class EpidemicToleranceSimulation(GetRemotionFrequencies):
         super().__init__(G, max_removal_rate, num_points)
         self.epidemic_data = SIR_Model(G, mu, nu, duration, infected_t0)
         self.G = G
+        self.csr = graph_to_csr(G)
+        self.degrees = degrees_csr(self.csr, G.is_directed())
         
         
     def epidemic_property_vs_removals(self, property_function, removal_function, num_simulations, random_seed = None, *args, **kwargs):
@@ -476,7 +718,9 @@ class EpidemicToleranceSimulation(GetRemotionFrequencies):
         property_function : function
             A function that calculates a specific property of the epidemic.
         removal_function : function
-            A function that removes nodes from the network.
+            A function that removes nodes from the network. It gets the 
+            adjacency matrix 'csr' if it is marked with 'accepts_csr()', the
+            networkx graph 'G' otherwise.
         num_simulations: int
             The number of simulations to run for each removal stage, allowing 
             for the averaging of results 
@@ -524,20 +768,47 @@ class EpidemicToleranceSimulation(GetRemotionFrequencies):
             np.random.seed(random_seed)
 
         property_values = []
+        
+        # the adjacency matrix is used only if the removal function can take it
+        use_csr = getattr(removal_function, 'accepts_csr', False)
+        
+        # the removal functions that use the node degrees get the ones of the 
+        # original network, computed only once: an array for the matrix, a 
+        # dict as 'G.degree()' for the graph
+        removal_parameters = inspect.signature(removal_function).parameters
+        removal_kwargs = {}
+        if 'degrees' in removal_parameters:
+            removal_kwargs['degrees'] = self.degrees if use_csr else dict(zip(self.G.nodes(), self.degrees.tolist()))
+        # and the ones that take the nodes by decreasing degree get them sorted
+        # once: each frequency removes the first nodes of this order
+        if 'order' in removal_parameters:
+            removal_kwargs['order'] = np.argsort(-self.degrees, kind='stable')
+        # the random removal functions draw a single order of the nodes: each
+        # frequency removes the first nodes of it, without sampling again
+        if 'permutation' in removal_parameters:
+            removal_kwargs['permutation'] = np.random.permutation(self.number_of_nodes)
+        
+        # checking once if the property function requires recovery evolution
+        needs_recovery = 'recovery_evolution' in inspect.signature(property_function).parameters
          
         for num_removed_nodes in self.num_removals_cleaned:
-            G_modified = removal_function(self.G, num_removed_nodes)
-            
-            # Each row represents an epidemic simulation
-            infected = np.zeros((num_simulations, self.epidemic_data.duration))
-            recovered = np.zeros((num_simulations, self.epidemic_data.duration))
+            # the nodes are removed from the adjacency matrix, without copying
+            # and relabeling the networkx graph (nor copying the matrix when no
+            # node is removed)
+            if not use_csr:
+                network_modified = removal_function(self.G, num_removed_nodes, **removal_kwargs)
+            elif num_removed_nodes == 0:
+                network_modified = self.csr
+            else:
+                network_modified = removal_function(self.csr, num_removed_nodes, **removal_kwargs)
+            # the same edges are used by all the simulations
+            edges = self.epidemic_data.get_edges(network_modified)
             
-            for simulation in range(num_simulations): 
-                infected[simulation, :], recovered[simulation, :] = self.epidemic_data.evolution(G_modified, plot_spread = False)
+            # Each row represents an epidemic simulation, all of them run together
+            infected, recovered = self.epidemic_data.evolution_batch(network_modified, num_simulations, edges = edges)
             
             # Calculate the epidemic property
-            # checking if the property function requires recovery evolution
-            if 'recovery_evolution' in inspect.signature(property_function).parameters:
+            if needs_recovery:
                 result = property_function(infected, recovered, *args, **kwargs)
             else:
                 result = property_function(infected, *args, **kwargs)
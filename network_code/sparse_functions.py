@@ -0,0 +1,304 @@
+'''
+    This file contains the functions to handle the sparse representation of
+    networks.
+
+    The adjacency matrix of a network is stored in compressed sparse row (CSR)
+    format: the neighbours of the node 'i' are 'indices[indptr[i]:indptr[i+1]]'.
+    Building it once and working on its contiguous integer arrays avoids
+    walking the dict-of-dicts adjacency of networkx at every node removal.
+
+'''
+
+import networkx as nx
+import numpy as np
+from scipy import sparse
+from scipy.sparse import csgraph
+
+# number of bits set in each byte, to count the pairs of nodes in the bit sets
+_BYTE_POPCOUNT = np.array([bin(byte).count('1') for byte in range(256)], dtype=np.uint8)
+
+
+def accepts_csr(function):
+    '''
+    Marks 'function' as able to take the adjacency matrix of a network in 
+    CSR format (see 'graph_to_csr()') in place of the networkx graph.
+    
+    The simulations pass their cached adjacency matrix only to the marked 
+    functions: any other property or removal function gets the networkx 
+    graph, as usual.
+
+    Parameters
+    ----------
+    function : function
+        A property or removal function that works on both the networkx graph
+        and its adjacency matrix.
+
+    Returns
+    -------
+    function
+        The same function, with the attribute 'accepts_csr' set to True.
+    '''
+    function.accepts_csr = True
+    return function
+
+def graph_to_csr(G):
+    '''
+    Converts the graph 'G' into its adjacency matrix in CSR format.
+
+    The i-th row (and column) of the matrix corresponds to the i-th node in
+    'G.nodes()'. For undirected graphs the matrix is symmetric.
+
+    Parameters
+    ----------
+    G : networkx.classes.graph.Graph
+        The input graph.
+
+    Returns
+    -------
+    A : scipy.sparse.csr_array
+        The adjacency matrix of 'G' with 'int8' entries and 'int32' index
+        arrays ('A.indptr', 'A.indices').
+
+    Examples
+    --------
+    >>> G = nx.path_graph(3)
+    >>> A = graph_to_csr(G)
+    >>> A.indptr
+    array([0, 1, 3, 4], dtype=int32)
+    >>> A.indices
+    array([1, 0, 2, 1], dtype=int32)
+
+    Notes
+    -----
+    Edge weights are ignored: every edge is stored with a value of 1.
+    '''
+    number_of_nodes = G.number_of_nodes()
+
+    # networkx can't convert graphs without nodes
+    if number_of_nodes == 0:
+        return sparse.csr_array((0, 0), dtype=np.int8)
+
+    A = nx.to_scipy_sparse_array(G, format='csr', dtype=np.int8, weight=None)
+    A.indptr = A.indptr.astype(np.int32)
+    A.indices = A.indices.astype(np.int32)
+    return A
+
+def remove_nodes_csr(A, nodes_to_remove):
+    '''
+    Removes the nodes whose indices are in 'nodes_to_remove' from the
+    adjacency matrix 'A'.
+
+    The nodes are removed by marking them in a boolean mask of the alive
+    nodes and slicing the rows and columns of 'A': the adjacency of the
+    original matrix is never rebuilt.
+
+    Parameters
+    ----------
+    A : scipy.sparse.csr_array
+        The adjacency matrix of the network.
+
+    nodes_to_remove : array-like of int
+        The row indices of the nodes to remove.
+
+    Returns
+    -------
+    scipy.sparse.csr_array
+        The adjacency matrix of the network without the removed nodes.
+
+    Examples
+    --------
+    >>> A = graph_to_csr(nx.path_graph(4))
+    >>> remove_nodes_csr(A, [1]).shape
+    (3, 3)
+    '''
+    alive = np.ones(A.shape[0], dtype=bool)
+    alive[np.asarray(nodes_to_remove, dtype=np.int64)] = False
+    return A[alive][:, alive]
+
+def degrees_csr(A, directed = None):
+    '''
+    Calculates the degree of each node of the adjacency matrix 'A', with the
+    same convention of 'G.degree()' in networkx.
+
+    For undirected graphs the degree is the number of entries of the row, 
+    with a self-loop counted twice. For directed graphs it is the sum of the
+    in- and out-degree, so a self-loop is counted once in each of them.
+
+    Parameters
+    ----------
+    A : scipy.sparse.csr_array
+        The adjacency matrix of the network.
+        
+    directed : bool, optional
+        Whether 'A' is the adjacency matrix of a directed graph. If None 
+        (default) the graph is taken as directed when 'A' is not symmetric.
+
+    Returns
+    -------
+    numpy.ndarray
+        The array of the degrees, one for each row of 'A'.
+        
+    Examples
+    --------
+    >>> G = nx.path_graph(3)
+    >>> G.add_edge(0, 0)
+    >>> degrees_csr(graph_to_csr(G))
+    array([3, 2, 1])
+    '''
+    if directed is None:
+        directed = (A != A.T).nnz != 0
+        
+    out_degree = np.diff(A.indptr)
+    if directed:
+        return out_degree + np.bincount(A.indices, minlength=A.shape[0])
+    
+    # the self-loop is a single entry on the diagonal, but networkx counts 
+    # both of its ends
+    return out_degree + (A.diagonal() != 0)
+
+def component_sizes_csr(A):
+    '''
+    Calculates the sizes of the connected components of the adjacency matrix
+    'A'.
+
+    The components are the weakly connected ones, which coincide with the
+    connected components when 'A' is symmetric (undirected graph).
+
+    Parameters
+    ----------
+    A : scipy.sparse.csr_array
+        The adjacency matrix of the network.
+
+    Returns
+    -------
+    numpy.ndarray
+        The number of nodes of each component.
+
+    Examples
+    --------
+    >>> G = nx.path_graph(4)
+    >>> nx.add_path(G, [10, 11, 12])
+    >>> component_sizes_csr(graph_to_csr(G))
+    array([4, 3])
+    '''
+    _, labels = csgraph.connected_components(A, directed=True, connection='weak')
+    return np.bincount(labels)
+
+def _path_lengths_csgraph(A, sources, chunk_size = 64):
+    '''
+    Returns the sum and the number of the finite shortest path lengths from
+    the nodes 'sources' to the other nodes of the adjacency matrix 'A'.
+    The sources are handled 'chunk_size' at a time, to bound the memory of
+    the dense distance matrix.
+    '''
+    total_length = 0
+    number_of_paths = 0
+    for start in range(0, len(sources), chunk_size):
+        distances = csgraph.shortest_path(A, directed=True, unweighted=True,
+                                          indices=sources[start:start + chunk_size])
+        lengths = distances[np.isfinite(distances) & (distances > 0)]
+        total_length += int(lengths.sum())
+        number_of_paths += len(lengths)
+    return total_length, number_of_paths
+
+def fast_diameter(A, block_size = 1024, max_levels = 64):
+    '''
+    Calculates the average length of the shortest paths among all the pairs
+    of nodes of the adjacency matrix 'A' that are connected by a path.
+
+    The edges are unweighted, so the lengths come from breadth-first searches
+    run from 'block_size' source nodes at once. Each node keeps one bit per
+    source in an array of 'uint64' words, and a level of all the searches is
+    an OR of the bits of the in-neighbours of the nodes, gathered on the CSR
+    arrays of the transposed matrix. Only the edges leaving the nodes reached
+    at the last level are gathered. When the searches of a block go deeper
+    than 'max_levels', as in long chains, the lengths of the block come from
+    'scipy.sparse.csgraph.shortest_path' instead, which does not pay a numpy
+    call per level.
+
+    Parameters
+    ----------
+    A : scipy.sparse.csr_array
+        The adjacency matrix of the network.
+
+    block_size : int, optional
+        The number of source nodes of each block of searches (default is 1024).
+
+    max_levels : int, optional
+        The number of levels of the searches of a block after which its
+        lengths are computed by 'csgraph.shortest_path' (default is 64).
+
+    Returns
+    -------
+    float
+        The average shortest path length; 0 if there are no paths.
+
+    Examples
+    --------
+    >>> fast_diameter(graph_to_csr(nx.path_graph(3)))
+    1.3333333333333333
+    '''
+    number_of_nodes = A.shape[0]
+    # the searches follow the edges i -> j: node j is reached from the nodes
+    # in the row j of the transposed matrix
+    A_in = A.T.tocsr()
+    in_neighbours = A_in.indices
+    edge_targets = np.repeat(np.arange(number_of_nodes), np.diff(A_in.indptr))
+
+    total_length = 0
+    number_of_paths = 0
+
+    for start in range(0, number_of_nodes, block_size):
+        sources = np.arange(start, min(start + block_size, number_of_nodes))
+        bits = np.arange(len(sources))
+
+        # one bit for each source: the nodes reached at the last level
+        frontier = np.zeros((number_of_nodes, (len(sources) + 63)//64), dtype=np.uint64)
+        frontier[sources, bits//64] = np.left_shift(np.uint64(1), (bits % 64).astype(np.uint64))
+        visited = frontier.copy()
+        # the nodes with some bit in the frontier
+        frontier_nodes = sources
+        in_frontier = np.zeros(number_of_nodes, dtype=bool)
+        in_frontier[sources] = True
+
+        block_length = 0
+        block_paths = 0
+        distance = 0
+        while len(frontier_nodes) > 0:
+            distance += 1
+            if distance > max_levels:
+                block_length, block_paths = _path_lengths_csgraph(A, sources)
+                break
+            # the edges leaving the frontier, still sorted by target node
+            active = in_frontier[in_neighbours]
+            targets = edge_targets[active]
+            if len(targets) == 0:
+                break
+            starts = np.flatnonzero(np.diff(targets, prepend=-1))
+            reached_nodes = targets[starts]
+            reached = np.bitwise_or.reduceat(frontier[in_neighbours[active]], starts, axis=0)
+            # keep out the nodes already reached by a shorter path, including
+            # each source itself
+            new = reached & ~visited[reached_nodes]
+            new_paths = int(_BYTE_POPCOUNT[new.view(np.uint8)].sum())
+            if new_paths == 0:
+                break
+
+            visited[reached_nodes] |= new
+            block_length += distance*new_paths
+            block_paths += new_paths
+
+            # the next frontier replaces the last one, row by row
+            frontier[frontier_nodes] = 0
+            in_frontier[frontier_nodes] = False
+            has_new = new.any(axis=1)
+            frontier_nodes = reached_nodes[has_new]
+            frontier[frontier_nodes] = new[has_new]
+            in_frontier[frontier_nodes] = True
+
+        total_length += block_length
+        number_of_paths += block_paths
+
+    if number_of_paths == 0:
+        return 0
+    return total_length/number_of_paths
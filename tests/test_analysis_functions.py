@@ -9,7 +9,7 @@ import random as rn
 from network_code.analysis_functions import generate_network, connectivity_analysis, fragmentation_analysis, epidemic_feature_analysis
 from network_code.simulation import ToleranceSimulation, EpidemicToleranceSimulation
 from network_code import diameter, largest_connected_component_size, average_size_connected_components
-from network_code import peak, t_peak, epidemic_duration, total_infected
+from network_code import peak, t_peak, epidemic_duration, total_infected, epidemic_features
 from network_code import error, attack
 
 # constants for network creation
@@ -380,3 +380,49 @@ def test_epidemic_feature_check_infected_attack(epidemic_sim, infected_output, n
     array_output = np.array(infected_output[2])
     diff = array_output - array_expected
     assert (diff < 1e-7).all()
+
+def test_connectivity_parallel(structural_sim, connectivity_output):
+    '''
+    Tests that running the sweeps of 'connectivity_analysis' in parallel 
+    processes gives the same results of the sequential run
+    
+    GIVEN: an istance of the 'ToleranceSimulation' class and the results from
+        the sequential 'connectivity_analysis' function
+    WHEN: the same analysis runs with two processes and the same seed
+    THEN: the outputs are equal
+    '''
+    output = connectivity_analysis(structural_sim, random_seed = 10203, n_jobs = 2)
+    for result, expected in zip(output, connectivity_output):
+        assert np.allclose(result, expected)
+
+@pytest.mark.parametrize("n_jobs", [0, -2])
+def test_invalid_n_jobs(structural_sim, n_jobs):
+    '''
+    Tests that an invalid number of processes is refused before running the
+    sweeps
+    
+    GIVEN: an istance of the 'ToleranceSimulation' class
+    WHEN: 'connectivity_analysis' runs with 'n_jobs' neither -1 nor positive
+    THEN: a ValueError is raised
+    '''
+    with pytest.raises(ValueError):
+        connectivity_analysis(structural_sim, n_jobs = n_jobs)
+
+def test_epidemic_features_single_sweep(epidemic_sim, peak_output, infected_output):
+    '''
+    Tests that 'epidemic_feature_analysis' with 'epidemic_features' gives 
+    one list for each metric, equal to the one of its own sweeps
+    
+    GIVEN: an istance of the 'EpidemicToleranceSimulation' class and the results 
+        of 'epidemic_feature_analysis' for 'peak' and 'total_infected'
+    WHEN: the analysis runs once with 'epidemic_features' and the same seed
+    THEN: the first and the last lists of the errors and of the attacks are 
+        the results for 'peak' and 'total_infected'
+    '''
+    freq, results_error, results_attack = epidemic_feature_analysis(epidemic_sim, epidemic_features, num_simulations = 1, random_seed = 10203)
+    assert len(results_error) == len(results_attack) == 4
+    assert np.allclose(freq, peak_output[0])
+    assert np.allclose(results_error[0], peak_output[1])
+    assert np.allclose(results_attack[0], peak_output[2])
+    assert np.allclose(results_error[3], infected_output[1])
+    assert np.allclose(results_attack[3], infected_output[2])
@@ -26,4 +26,8 @@ def test_epidemics_funcs_duration_function_mapping():
     assert EPIDEMICS_FUNCS['duration'][0] is epidemic_duration
     
 def test_epidemics_funcs_infected_function_mapping():
-    assert EPIDEMICS_FUNCS['total_infected'][0] is total_infected
\ No newline at end of file
+    assert EPIDEMICS_FUNCS['total_infected'][0] is total_infected    
+def test_epidemics_funcs_order_of_epidemic_features():
+    # the results of 'epidemic_features' follow the order of the keys
+    functions = [EPIDEMICS_FUNCS[key][0] for key in EPIDEMICS_FUNCS]
+    assert functions == [peak, t_peak, epidemic_duration, total_infected]
@@ -4,7 +4,7 @@
 import pytest
 import numpy as np
 
-from network_code.analysis_functions import peak, t_peak, epidemic_duration, total_infected
+from network_code.analysis_functions import peak, t_peak, epidemic_duration, total_infected, epidemic_features
 
 
 @pytest.fixture
@@ -93,6 +93,35 @@ class TestDuration:
         expected = np.mean(np.count_nonzero(array_2D, axis=1))
         assert epidemic_duration(array_2D) == expected
         
+    def test_duration_first_to_last(self):
+        ''' This function tests that 'epidemic_duration' goes from the first to 
+        the last time step with infected cases
+        
+        GIVEN: infection evolutions with zeros before, inside and after the
+            epidemic, and one without infected cases
+        WHEN: I apply to them the 'epidemic_duration' function
+        THEN: the durations are the time steps between the first and the last
+            non-zero values (included), or 0
+        '''
+        infected = np.array([[0, 10, 0, 20, 0], [0, 0, 0, 0, 0]])
+        assert epidemic_duration(infected[0]) == 3
+        assert epidemic_duration(infected[1]) == 0
+        assert epidemic_duration(infected) == 1.5
+        
+    def test_duration_counts_gaps(self):
+        ''' This function tests that 'epidemic_duration' counts the time steps
+        without infected cases inside the epidemic
+        
+        GIVEN: an infection evolution with a gap of zeros between two non-zero
+            values
+        WHEN: I apply to it the 'epidemic_duration' function
+        THEN: the duration includes the gap, so it is larger than the number 
+            of non-zero values
+        '''
+        infected = np.array([5, 0, 0, 3])
+        assert epidemic_duration(infected) == 4
+        assert epidemic_duration(infected) != np.count_nonzero(infected)
+        
     def test_duration_valid_output_1D(self, array_1D):
         ''' This function check that the output of 'epidemic_duration' is a number
         
@@ -151,3 +180,18 @@ class TestTotalInfected:
         output = total_infected(array1, array2)
         assert isinstance(output, (int, float, np.integer, np.floating))
     
+
+class TestEpidemicFeatures:
+    def test_features_same_as_single_functions(self, array_2D):
+        ''' This function checks that 'epidemic_features' gives the values of 
+        the single feature functions
+        
+        GIVEN: valid 2D arrays of infected and recovered nodes
+        WHEN: I apply to them the 'epidemic_features' function
+        THEN: the result is the tuple of 'peak', 't_peak', 'epidemic_duration'
+            and 'total_infected' of the same arrays
+        '''
+        recovered = np.array([[0, 1, 4, 7], [0, 3, 4, 10]])
+        expected = (peak(array_2D), t_peak(array_2D), epidemic_duration(array_2D),
+                    total_infected(array_2D, recovered))
+        assert epidemic_features(array_2D, recovered) == expected
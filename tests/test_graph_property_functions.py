@@ -8,6 +8,7 @@ import networkx as nx
 import numpy as np
 
 from network_code.analysis_functions import diameter, largest_connected_component_size, average_size_connected_components
+from network_code.analysis_functions import fragmentation
 
 
 @pytest.fixture
@@ -242,6 +243,31 @@ class TestAverageSizeConnecteComponets:
         result = average_size_connected_components(G_empty)
         assert result == 0
  
+class TestFragmentation:
+    
+    def test_fragmentation_same_as_single_features(self, G_undir_multi_components):
+        ''' This function tests that 'fragmentation' gives the same values of
+        the functions computing each feature
+        
+        GIVEN: an undirected graph with many components
+        WHEN: I apply to it the 'fragmentation' function
+        THEN: it returns the results of 'largest_connected_component_size' and 
+            'average_size_connected_components'
+        '''
+        S, s = fragmentation(G_undir_multi_components)
+        assert S == largest_connected_component_size(G_undir_multi_components)
+        assert s == average_size_connected_components(G_undir_multi_components)
+        
+    def test_fragmentation_empty_graph(self, G_empty):
+        ''' This function check that 'fragmentation' returns zeros when working 
+        with empty graphs
+        
+        GIVEN: an empty graph
+        WHEN: I apply to it the 'fragmentation' function
+        THEN: both the features are zero
+        '''
+        assert fragmentation(G_empty) == (0, 0)
+ 
 @pytest.mark.parametrize( 
     "graph_type", 
     [
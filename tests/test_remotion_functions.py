@@ -5,8 +5,9 @@
 import pytest
 import networkx as nx
 import random as rn
+import numpy as np
 
-from network_code.remotion_functions import attack, error
+from network_code.remotion_functions import attack, error, top_degree_nodes
     
 @pytest.fixture
 def graph():
@@ -65,6 +66,21 @@ def test_random_pick_error(graph):
     removed_nodes = graph.nodes() - G_error.nodes()
     assert removed_nodes == {15, 37, 57, 58, 89}
     
+def test_error_permutation(graph):
+    ''' This function tests that 'error' removes the first nodes of the given
+    permutation, so that more errors remove nested sets of nodes
+    
+    GIVEN: a valid input graph and a random permutation of its nodes
+    WHEN: the 'error' function is applied with 5 and then 10 errors
+    THEN: the removed nodes are the first 5 and 10 of the permutation
+    '''
+    permutation = np.random.permutation(graph.number_of_nodes())
+    
+    removed_5 = graph.nodes() - error(graph, 5, permutation = permutation).nodes()
+    removed_10 = graph.nodes() - error(graph, 10, permutation = permutation).nodes()
+    assert removed_5 == set(permutation[:5].tolist())
+    assert removed_10 == set(permutation[:10].tolist())
+    
 def test_strategy_pick_attack(graph):
     ''' This function tests the strategy for performing attacks 
     
@@ -121,3 +137,43 @@ def test_number_attacks(graph):
     G_error = error(graph, num_errors)
     num_removed_nodes = graph.number_of_nodes() - G_error.number_of_nodes()
     assert num_removed_nodes == num_errors
+
+def test_attack_precomputed_degrees(graph):
+    ''' This function tests that passing the degrees of the nodes to 'attack'
+    removes the same nodes as computing them inside the function
+    
+    GIVEN: a valid input graph and the degrees of its nodes
+    WHEN: the 'attack' function is applied with and without the degrees
+    THEN: the same nodes are removed
+    '''
+    degrees = dict(graph.degree())
+    G_attack = attack(graph, 10)
+    G_attack_degrees = attack(graph, 10, degrees = degrees)
+    assert set(G_attack.nodes()) == set(G_attack_degrees.nodes())
+
+def test_attack_degree_order(graph):
+    ''' This function tests that passing the nodes sorted by degree to 'attack'
+    removes the same nodes as selecting them inside the function
+    
+    GIVEN: a valid input graph and its nodes sorted by decreasing degree
+    WHEN: the 'attack' function is applied with and without the order
+    THEN: the same nodes are removed, for different numbers of attacks
+    '''
+    degrees = np.array([d for _, d in graph.degree()])
+    order = np.argsort(-degrees, kind='stable')
+    for num_attacks in [1, 10, 40]:
+        G_attack = attack(graph, num_attacks)
+        G_attack_order = attack(graph, num_attacks, order = order)
+        assert set(G_attack.nodes()) == set(G_attack_order.nodes())
+
+def test_top_degree_nodes_ties():
+    ''' This function tests that 'top_degree_nodes' selects the most connected
+    nodes breaking the ties by the order of the nodes
+    
+    GIVEN: an array of degrees with repeated values
+    WHEN: the 'top_degree_nodes' function selects some of the nodes
+    THEN: the result is the one of a stable sort by decreasing degree
+    '''
+    degrees = np.array([2, 5, 1, 5, 2, 2, 0])
+    expected = np.argsort(-degrees, kind='stable')[:4]
+    assert (top_degree_nodes(degrees, 4) == expected).all()
@@ -2,7 +2,10 @@ import pytest
 import random as rn
 import networkx as nx
 import numpy as np
-from network_code.simulation import GetRemotionFrequencies
+from network_code.simulation import GetRemotionFrequencies, ToleranceSimulation, EpidemicToleranceSimulation, SIR_Model
+from network_code.remotion_functions import attack
+from network_code.analysis_functions import fragmentation, peak
+from network_code.sparse_functions import graph_to_csr
 
 
 @pytest.fixture
@@ -98,3 +101,179 @@ def test_type_num_removals_cleaned(graph):
     freq = GetRemotionFrequencies(graph, num_points)
     assert isinstance(freq.num_removals_cleaned, (list, np.ndarray))
     
+
+def test_removals_not_above_number_of_nodes(graph):
+    ''' This function checks that the numbers of removals never exceed the 
+    number of nodes, even with a maximum removal rate above 1
+    
+    GIVEN: an input graph  
+    WHEN: an instance of the class 'GetRemotionFrequencies' is created with a
+        maximum removal rate of 2
+    THEN: the largest number of removals is the number of nodes
+    '''
+    freq = GetRemotionFrequencies(graph, max_removal_rate = 2, num_points = 10)
+    assert freq.num_removals_cleaned.max() == graph.number_of_nodes()
+    
+def test_edges_adjacency_matrix(graph):
+    ''' This function checks that 'SIR_Model.get_edges' finds the same edges 
+    in the graph and in its adjacency matrix
+    
+    GIVEN: an input graph and its adjacency matrix
+    WHEN: the edges are built with 'SIR_Model.get_edges' from both of them
+    THEN: the two sets of edges (as pairs of sorted nodes) are the same
+    '''
+    model = SIR_Model(graph, mu = 0.2, nu = 0.1, duration = 10, infected_t0 = 1)
+    
+    u, v = model.get_edges(graph)
+    u_csr, v_csr = model.get_edges(graph_to_csr(graph))
+    
+    edges = set(zip(np.minimum(u, v).tolist(), np.maximum(u, v).tolist()))
+    edges_csr = set(zip(u_csr.tolist(), v_csr.tolist()))
+    assert len(u_csr) == graph.number_of_edges() and edges == edges_csr
+
+def test_evolution_batch_without_recovery(graph):
+    ''' This function checks that the epidemics of 'SIR_Model.evolution_batch'
+    follow the SIR rules
+    
+    GIVEN: a connected network where the infection always spreads and no node 
+        recovers
+    WHEN: many epidemics are simulated at once with 'evolution_batch'
+    THEN: there is one row for each epidemic, no node is recovered and all the
+        nodes are infected at the end of each epidemic
+    '''
+    model = SIR_Model(graph, mu = 1, nu = 0, duration = 100, infected_t0 = 1)
+    
+    infected, recovered = model.evolution_batch(graph_to_csr(graph), num_simulations = 5)
+    
+    assert infected.shape == (5, 100) and recovered.shape == (5, 100)
+    assert (recovered == 0).all() and (infected[:, -1] == 1).all()
+
+def test_evolution_stops_without_infected(graph):
+    ''' This function checks that the rates keep their values after the 
+    epidemic has ended
+    
+    GIVEN: an epidemic where the disease is never transmitted and the infected
+        nodes always recover
+    WHEN: it is simulated with 'evolution' and 'evolution_batch'
+    THEN: after the first time step no node is infected and the fraction of
+        recovered nodes doesn't change
+    '''
+    model = SIR_Model(graph, mu = 0, nu = 1, duration = 20, infected_t0 = 1)
+    
+    infected, recovered = model.evolution(graph)
+    assert (infected == 0).all() and (recovered == recovered[0]).all()
+    
+    infected, recovered = model.evolution_batch(graph, num_simulations = 3)
+    assert (infected == 0).all() and (recovered == recovered[:, :1]).all()
+
+def test_networkx_property_function(graph):
+    ''' This function checks that a networkx property function gets the 
+    graph in 'ToleranceSimulation.graph_property_vs_removals'
+    
+    GIVEN: an input graph and a property function of networkx
+    WHEN: the property is computed as a function of the attacks
+    THEN: the values are the ones of the property on the attacked graphs
+    '''
+    sim = ToleranceSimulation(graph, num_points = 5)
+    _, values = sim.graph_property_vs_removals(nx.density, attack)
+    expected = [nx.density(attack(graph, i)) for i in sim.num_removals_cleaned]
+    assert values == expected
+
+def test_networkx_removal_function(graph):
+    ''' This function checks that a removal function written for networkx 
+    graphs gets the graph in 'ToleranceSimulation.graph_property_vs_removals'
+    
+    GIVEN: an input graph and a removal function that works only on graphs
+    WHEN: a property is computed as a function of its removals
+    THEN: the values are the ones of the property on the graphs after the 
+        removals
+    '''
+    def remove_first_nodes(G, num_removals):
+        G_removed = G.copy()
+        G_removed.remove_nodes_from(list(G.nodes())[:num_removals])
+        return G_removed
+    
+    sim = ToleranceSimulation(graph, num_points = 5)
+    _, values = sim.graph_property_vs_removals(fragmentation, remove_first_nodes)
+    expected = [fragmentation(remove_first_nodes(graph, i)) for i in sim.num_removals_cleaned]
+    assert values == expected
+
+def test_epidemic_networkx_removal_function(graph):
+    ''' This function checks that a removal function written for networkx 
+    graphs gets the graph in 
+    'EpidemicToleranceSimulation.epidemic_property_vs_removals'
+    
+    GIVEN: an input graph and a removal function that works only on graphs
+    WHEN: an epidemic property is computed as a function of its removals
+    THEN: the removal function is always called on a networkx graph
+    '''
+    def remove_first_nodes(G, num_removals):
+        assert isinstance(G, nx.Graph)
+        G_removed = G.copy()
+        G_removed.remove_nodes_from(list(G.nodes())[:num_removals])
+        return G_removed
+    
+    sim = EpidemicToleranceSimulation(graph, mu = 0.2, nu = 0.1, duration = 10, 
+                                      infected_t0 = 1, num_points = 5)
+    freq, values = sim.epidemic_property_vs_removals(peak, remove_first_nodes, 5)
+    assert len(values) == len(freq)
+
+def test_no_recovery_in_the_infection_step():
+    ''' This function checks that the nodes infected in a time step don't 
+    recover in the same step
+    
+    GIVEN: a path graph with the first node infected, a transmission and a 
+        recovery that always happen
+    WHEN: one time step is performed with 'SIR_Model.step' and with 
+        'evolution_batch'
+    THEN: the first node has recovered and its neighbour is infected, not 
+        recovered
+    '''
+    graph = nx.path_graph(3)
+    model = SIR_Model(graph, mu = 1, nu = 1, duration = 1, infected_t0 = 1)
+    u, v = model.get_edges(graph)
+    
+    state = model.step(u, v, np.array([1, 0, 0], dtype=np.int8))
+    assert state.tolist() == [-1, 1, 0]
+    
+    # whichever node starts infected, at least one neighbour is infected 
+    # after the first step
+    infected, _ = model.evolution_batch(graph, num_simulations = 5)
+    assert (infected[:, 0] > 0).all()
+
+def test_plot_spread_after_removals(graph):
+    ''' This function checks that the spread of the epidemic can be plotted
+    on a network with removed nodes
+    
+    GIVEN: a model of the original network and the network after an attack
+    WHEN: the epidemic runs on the attacked network with 'plot_spread=True'
+    THEN: the plot is drawn and the evolution has one value for each time step
+    '''
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    
+    model = SIR_Model(graph, mu = 0.2, nu = 0.1, duration = 2, infected_t0 = 1)
+    infected, _ = model.evolution(attack(graph, 10), plot_spread = True)
+    plt.close('all')
+    assert len(infected) == 2
+
+def test_self_loop_edges():
+    ''' This function checks that the self-loops don't take part in the 
+    epidemic
+    
+    GIVEN: a complete graph with a self-loop and all the nodes infected
+    WHEN: the edges are built with 'SIR_Model.get_edges' and the epidemics run
+        with 'evolution_batch'
+    THEN: there are no edges from a node to itself and the epidemics run to 
+        the end
+    '''
+    graph = nx.complete_graph(4)
+    graph.add_edge(0, 0)
+    model = SIR_Model(graph, mu = 1, nu = 0, duration = 3, infected_t0 = 50)
+    
+    u, v = model.get_edges(graph)
+    assert (u != v).all() and len(u) == 6
+    
+    infected, _ = model.evolution_batch(graph, num_simulations = 3)
+    assert (infected == 1).all()
@@ -0,0 +1,188 @@
+'''
+    This script contains the tests for the functions in 'sparse_functions'
+'''
+
+import pytest
+import networkx as nx
+import numpy as np
+
+from network_code.sparse_functions import graph_to_csr, remove_nodes_csr, degrees_csr, fast_diameter
+
+
+@pytest.fixture
+def graph():
+    return nx.erdos_renyi_graph(100, 0.05)
+
+def test_csr_shape(graph):
+    ''' This function checks that the adjacency matrix has one row and one
+    column for each node of the graph
+
+    GIVEN: a valid input graph
+    WHEN: it is converted with 'graph_to_csr'
+    THEN: the shape of the matrix is (number of nodes, number of nodes)
+    '''
+    A = graph_to_csr(graph)
+    n = graph.number_of_nodes()
+    assert A.shape == (n, n)
+
+def test_csr_symmetric_undirected(graph):
+    ''' This function checks that the adjacency matrix of an undirected graph
+    is symmetric
+
+    GIVEN: a valid undirected graph
+    WHEN: it is converted with 'graph_to_csr'
+    THEN: the matrix is equal to its transpose
+    '''
+    A = graph_to_csr(graph)
+    assert (A != A.T).nnz == 0
+
+def test_csr_index_type(graph):
+    ''' This function checks the type of the CSR index arrays
+
+    GIVEN: a valid input graph
+    WHEN: it is converted with 'graph_to_csr'
+    THEN: 'indptr' and 'indices' are 'int32' arrays
+    '''
+    A = graph_to_csr(graph)
+    assert A.indptr.dtype == np.int32 and A.indices.dtype == np.int32
+
+def test_csr_empty_graph():
+    ''' This function checks that 'graph_to_csr' works with empty graphs
+
+    GIVEN: an empty graph
+    WHEN: it is converted with 'graph_to_csr'
+    THEN: the matrix has shape (0, 0)
+    '''
+    A = graph_to_csr(nx.Graph())
+    assert A.shape == (0, 0)
+
+def test_degrees_csr(graph):
+    ''' This function checks that the degrees of the adjacency matrix follow
+    the degrees of the graph
+
+    GIVEN: a valid undirected graph
+    WHEN: 'degrees_csr' is applied on its adjacency matrix
+    THEN: each value is the degree of the corresponding node
+    '''
+    expected = np.array([d for _, d in graph.degree()])
+    assert (degrees_csr(graph_to_csr(graph)) == expected).all()
+
+def test_degrees_csr_self_loop():
+    ''' This function checks that 'degrees_csr' counts the self-loops as
+    networkx does
+
+    GIVEN: an undirected and a directed graph with self-loops
+    WHEN: 'degrees_csr' is applied on their adjacency matrices
+    THEN: the degrees are the ones of 'G.degree()'
+    '''
+    G = nx.path_graph(5)
+    G.add_edges_from([(0, 0), (3, 3)])
+    D = nx.DiGraph([(0, 1), (1, 2), (2, 2), (2, 0)])
+    
+    for graph, directed in ((G, False), (D, True)):
+        expected = dict(graph.degree())
+        degrees = degrees_csr(graph_to_csr(graph), directed = directed)
+        assert dict(zip(graph.nodes(), degrees.tolist())) == expected
+
+def test_remove_nodes_csr(graph):
+    ''' This function checks that 'remove_nodes_csr' gives the adjacency
+    matrix of the graph without the removed nodes
+
+    GIVEN: a valid input graph and some nodes to remove
+    WHEN: the nodes are removed from its adjacency matrix
+    THEN: the result is equal to the adjacency matrix of the graph after the
+        nodes have been removed
+    '''
+    nodes_to_remove = [3, 10, 57]
+    G_removed = graph.copy()
+    G_removed.remove_nodes_from(nodes_to_remove)
+
+    result = remove_nodes_csr(graph_to_csr(graph), nodes_to_remove)
+    expected = graph_to_csr(G_removed)
+    assert (result != expected).nnz == 0
+
+def test_fast_diameter_blocks(graph):
+    ''' This function checks that the blocks of source nodes don't change the 
+    result of 'fast_diameter'
+    
+    GIVEN: a valid input graph
+    WHEN: 'fast_diameter' is applied on its adjacency matrix with blocks of 
+        different sizes
+    THEN: the average shortest path length is always the same
+    '''
+    A = graph_to_csr(graph)
+    expected = fast_diameter(A, block_size = A.shape[0])
+    assert np.isclose(fast_diameter(A, block_size = 7), expected)
+    assert np.isclose(fast_diameter(A, block_size = 1), expected)
+
+def average_path_length(G):
+    ''' Average shortest path length over the pairs of nodes connected by a 
+    path, computed with networkx as the original 'diameter' '''
+    lengths = [length for _, paths in nx.shortest_path_length(G)
+               for length in paths.values() if length > 0]
+    return np.mean(lengths) if lengths else 0
+
+def test_fast_diameter_connected():
+    ''' This function checks 'fast_diameter' against networkx on connected 
+    graphs
+    
+    GIVEN: a connected undirected graph and a strongly connected directed graph
+    WHEN: 'fast_diameter' is applied on their adjacency matrices
+    THEN: the result is 'nx.average_shortest_path_length'
+    '''
+    G = nx.connected_watts_strogatz_graph(200, 4, 0.1, seed = 1)
+    D = nx.DiGraph([(i, (i + 1) % 30) for i in range(30)] + [(0, 15), (20, 3)])
+    
+    for graph in (G, D):
+        expected = nx.average_shortest_path_length(graph)
+        assert np.isclose(fast_diameter(graph_to_csr(graph)), expected)
+
+def test_fast_diameter_disconnected():
+    ''' This function checks 'fast_diameter' against networkx on graphs that 
+    are not connected
+    
+    GIVEN: an undirected graph with many components and isolated nodes and a
+        directed graph that is not strongly connected
+    WHEN: 'fast_diameter' is applied on their adjacency matrices
+    THEN: the result is the average length of the shortest paths among the 
+        pairs of nodes connected by a path
+    '''
+    G = nx.erdos_renyi_graph(150, 0.01, seed = 2)
+    G.add_nodes_from([150, 151])
+    D = nx.gnp_random_graph(80, 0.03, seed = 3, directed = True)
+    
+    for graph in (G, D):
+        expected = average_path_length(graph)
+        assert np.isclose(fast_diameter(graph_to_csr(graph)), expected)
+
+def test_fast_diameter_without_edges():
+    ''' This function checks that 'fast_diameter' returns 0 without paths
+    
+    GIVEN: a graph with nodes and no edges
+    WHEN: 'fast_diameter' is applied on its adjacency matrix
+    THEN: the result is 0
+    '''
+    G = nx.empty_graph(5)
+    assert fast_diameter(graph_to_csr(G)) == 0
+
+def test_fast_diameter_long_chains():
+    ''' This function checks 'fast_diameter' on networks with a diameter much
+    longer than 'max_levels', whose blocks fall back to 'csgraph'
+
+    GIVEN: a long undirected path and two disjoint directed chains
+    WHEN: 'fast_diameter' is applied on their adjacency matrices, with and
+        without the fallback
+    THEN: the result is the average length of the shortest paths among the
+        pairs of nodes connected by a path
+    '''
+    G = nx.path_graph(3000)
+    D = nx.disjoint_union(nx.path_graph(300, create_using = nx.DiGraph),
+                          nx.path_graph(40, create_using = nx.DiGraph))
+
+    assert np.isclose(fast_diameter(graph_to_csr(G)), (3000 + 1)/3)
+    for graph in (G.subgraph(range(500)), D):
+        A = graph_to_csr(graph)
+        expected = average_path_length(graph)
+        assert np.isclose(fast_diameter(A), expected)
+        assert np.isclose(fast_diameter(A, block_size = 50, max_levels = 10), expected)
+        assert np.isclose(fast_diameter(A, max_levels = A.shape[0]), expected)